@@ -1,33 +1,52 @@
 #!/usr/bin/env python3
 import json
+import os
+import socket
+import struct
 import subprocess
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FRAME_HEADER = struct.Struct(">I")
+
 
 class McpClient:
     def __init__(self, server_path: str):
+        # One UNIX socket serves as both the server's stdin and stdout
+        self.sock, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
         self.process = subprocess.Popen(
             [server_path],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
+            stdin=child,
+            stdout=child,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1  # Line-buffered
+            env={**os.environ, "UNHCR_FRAMED": "1"}  # Length-prefixed messages
         )
+        child.close()
+        self.reader = self.sock.makefile("rb")
         # Print initial server output (e.g., "running on stdio")
-        print(self.process.stderr.readline().strip(), file=sys.stderr)
+        print(self.process.stderr.readline().decode().strip(), file=sys.stderr)
 
     def send_request(self, request: dict) -> dict:
         # Send request to server's stdin
-        self.process.stdin.write(json.dumps(request) + "\n")
-        self.process.stdin.flush()
+        if orjson is not None:
+            payload = orjson.dumps(request)
+        else:
+            payload = json.dumps(request).encode()
+        self.sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
 
         # Read response from server's stdout
-        response_line = self.process.stdout.readline().strip()
-        return json.loads(response_line)
+        (length,) = FRAME_HEADER.unpack(self.reader.read(FRAME_HEADER.size))
+        body = self.reader.read(length)
+        return orjson.loads(body) if orjson is not None else json.loads(body)
 
     def close(self):
         self.process.terminate()
+        self.reader.close()
+        self.sock.close()
 
 if __name__ == "__main__":
     client = McpClient("./unhcr_demographics.py")
@@ -7,7 +7,7 @@ setup(
     author="rvibek",
     url="https://github.com/rvibek/mcp_demographics",
     py_modules=["unhcr_demographics"],  # Single module, not a package with subdirs
-    install_requires=["requests", "websockets"],     # Add other dependencies if needed
+    install_requires=["urllib3", "certifi", "websockets", "orjson"],     # Add other dependencies if needed
     entry_points={
         "console_scripts": [
             "unhcr-demographics = unhcr_demographics:main"  
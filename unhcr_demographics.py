@@ -1,11 +1,73 @@
 #!/usr/bin/env python3
 
+import functools
 import json
+import os
 import signal
+import socket
+import struct
 import sys
 from typing import Any, Dict, List, Optional
 
-import requests
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes")
+
+
+# Set UNHCR_DEBUG=1 (or true/yes) to trace every request/response on stderr.
+DEBUG = _env_flag("UNHCR_DEBUG")
+# Set UNHCR_FRAMED=1 (or true/yes) to exchange 4-byte length-prefixed messages instead of lines.
+FRAMED = _env_flag("UNHCR_FRAMED")
+
+_FRAME_HEADER = struct.Struct(">I")
+_READ_SIZE = 65536
+# Anything larger is a protocol mismatch (e.g. a line-delimited client), not a request.
+_MAX_FRAME = 4 * 1024 * 1024
+try:
+    # sysconf reports -1 when the limit is indeterminate.
+    _IOV_MAX = max(os.sysconf("SC_IOV_MAX"), 1)
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 16
+
+_VALID_YEARS = range(1950, 2026)
+
+_API_HOST = "api.unhcr.org"
+_DEMOGRAPHICS_PATH = "/population/v1/demographics/"
+
+# urllib3 is imported on first API call so listTools and startup never pay for it.
+_urllib3 = None
+
+
+if orjson is not None:
+    def _dumpb(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    _loads = orjson.loads
+else:
+    def _dumpb(obj: Any, indent: bool = False) -> bytes:
+        return json.dumps(obj, indent=2 if indent else None).encode()
+
+    _loads = json.loads
+
+
+def _dumps(obj: Any, indent: bool = False) -> str:
+    return _dumpb(obj, indent).decode()
+
+
+def _writev_all(fd: int, chunks: List[bytes]) -> None:
+    # writev may write only part of the batch on pipes and sockets.
+    while chunks:
+        written = os.writev(fd, chunks[:_IOV_MAX])
+        while chunks and written >= len(chunks[0]):
+            written -= len(chunks[0])
+            chunks.pop(0)
+        if written:
+            chunks[0] = chunks[0][written:]
 
 
 class ErrorCode:
@@ -22,15 +84,9 @@ class McpError(Exception):
 class UnhcrDemographicsServer:
     def __init__(self):
         self.running = True
-        signal.signal(signal.SIGINT, self._shutdown)
-
-    def _shutdown(self, signum, frame):
-        print("Shutting down UNHCR Demographics MCP server...", file=sys.stderr)
-        self.running = False
-        sys.exit(0)
-
-    def list_tools(self) -> Dict[str, Any]:
-        return {
+        self.pool = None
+        self._headers = None
+        self._tools_response = {
             "tools": [{
                 "name": "get_demographics",
                 "description": "Fetch refugee demographic statistics from UNHCR API",
@@ -47,6 +103,48 @@ class UnhcrDemographicsServer:
                 }
             }]
         }
+        self._tools = {"get_demographics": self.get_demographics}
+        self._dispatch = {
+            "listTools": lambda params: self.list_tools(),
+            "callTool": self._call_tool
+        }
+        signal.signal(signal.SIGINT, self._shutdown)
+
+    def _shutdown(self, signum, frame):
+        print("Shutting down UNHCR Demographics MCP server...", file=sys.stderr)
+        self.running = False
+        if self.pool is not None:
+            self.pool.close()
+        sys.exit(0)
+
+    def _connect(self):
+        global _urllib3
+        if _urllib3 is None:
+            import urllib3 as _urllib3
+        from urllib3.connection import HTTPConnection
+        from urllib3.util import make_headers
+        from urllib3.util.retry import Retry
+        import certifi
+
+        # Bound directly to the one host we talk to, so calls skip URL parsing
+        # and pool lookup entirely. urllib3 already sets TCP_NODELAY; keepalive
+        # probes keep the pooled connection alive across long idle gaps.
+        self.pool = _urllib3.HTTPSConnectionPool(
+            _API_HOST,
+            maxsize=10,
+            block=False,
+            retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504]),
+            timeout=10,
+            ca_certs=certifi.where(),  # Same CA bundle requests verified against
+            socket_options=HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        )
+        self._headers = {**make_headers(accept_encoding=True), "Accept": "application/json"}
+        return self.pool
+
+    def list_tools(self) -> Dict[str, Any]:
+        return self._tools_response
 
     def get_demographics(self, args: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
         year = args.get("year")
@@ -54,62 +152,78 @@ class UnhcrDemographicsServer:
         coa = args.get("coa")
         limit = args.get("limit", 100)
 
-        if not isinstance(year, int) or year < 1950 or year > 2025:
+        if type(year) is not int or year not in _VALID_YEARS:
             raise McpError(ErrorCode.INVALID_ARGUMENTS, f"Invalid year: {year}")
+        if type(limit) is not int:
+            raise McpError(ErrorCode.INVALID_ARGUMENTS, f"Invalid limit: {limit}")
 
         try:
-            response = requests.get(
-                "https://api.unhcr.org/population/v1/demographics/",
-                params={
-                    "year": year,
-                    "coo": coo.upper() if coo else None,
-                    "coa": coa.upper() if coa else None,
-                    "limit": limit
-                },
-                headers={"Accept": "application/json"},
-                timeout=10
-            )
-            response.raise_for_status()
-
-            raw_data = response.json()
-            print(f"Raw API response: {json.dumps(raw_data, indent=2)}", file=sys.stderr)
-
-            data = raw_data.get("data", raw_data)
-            if not isinstance(data, list):
-                if isinstance(data, dict):
-                    data = [data]
-                else:
-                    raise ValueError("Unexpected API response format")
-
-            return {
-                "content": [{
-                    "type": "text",
-                    "text": json.dumps(data, indent=2) if data else "No data available"
-                }]
-            }
-        except requests.RequestException as e:
-            return {
-                "content": [{"type": "text", "text": f"UNHCR API error: {str(e)}"}],
-                "isError": True
-            }
+            # Normalise before the cache lookup so "syr" and "SYR" share an entry
+            # and hits never build query params at all.
+            text = self._fetch(year, coo.upper() if coo else None, coa.upper() if coa else None, limit)
+            return {"content": [{"type": "text", "text": text}]}
         except Exception as e:
+            if _urllib3 is not None and isinstance(e, _urllib3.exceptions.HTTPError):
+                return {
+                    "content": [{"type": "text", "text": f"UNHCR API error: {str(e)}"}],
+                    "isError": True
+                }
             raise McpError(ErrorCode.INTERNAL_ERROR, f"Failed to fetch demographics: {str(e)}")
 
+    @functools.lru_cache(maxsize=256)
+    def _fetch(self, year: int, coo: Optional[str], coa: Optional[str], limit: int) -> str:
+        # Demographics are historical and immutable, so successful responses are
+        # cached by argument tuple. Failures raise and are therefore never cached.
+        params = {"year": year, "limit": limit}
+        if coo:
+            params["coo"] = coo
+        if coa:
+            params["coa"] = coa
+
+        pool = self.pool if self.pool is not None else self._connect()
+        response = pool.request("GET", _DEMOGRAPHICS_PATH, fields=params, headers=self._headers)
+        if response.status >= 400:
+            raise _urllib3.exceptions.HTTPError(
+                f"{response.status} {response.reason} for url: https://{_API_HOST}{_DEMOGRAPHICS_PATH}"
+            )
+
+        raw = response.data
+        try:
+            obj = _loads(raw)
+        except ValueError as e:
+            # A non-JSON 200 (e.g. a proxy error page) is an API error, not ours.
+            raise _urllib3.exceptions.HTTPError(f"Invalid JSON in API response: {e}")
+        is_envelope = isinstance(obj, dict)
+        if DEBUG:
+            total = obj.get("totalCount") if is_envelope else None
+            print(f"Raw API response: {len(raw)} bytes, totalCount={total}", file=sys.stderr)
+
+        # Resolve the payload in one step and encode it exactly once.
+        data = obj.get("data", obj) if is_envelope else obj
+        if isinstance(data, dict):
+            data = [data]
+        elif not isinstance(data, list):
+            raise ValueError("Unexpected API response format")
+
+        return _dumps(data, indent=True) if data else "No data available"
+
+    def _call_tool(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        tool_name = params.get("name")
+        tool = self._tools.get(tool_name) if isinstance(tool_name, str) else None
+        if tool is None:
+            raise McpError(ErrorCode.METHOD_NOT_FOUND, f"Unknown tool: {tool_name}")
+        return tool(params.get("arguments", {}))
+
     def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         request_id = request.get("id", 0)
         method = request.get("method")
         params = request.get("params", {})
 
         try:
-            if method == "listTools":
-                result = self.list_tools()
-            elif method == "callTool":
-                tool_name = params.get("name")
-                if tool_name != "get_demographics":
-                    raise McpError(ErrorCode.METHOD_NOT_FOUND, f"Unknown tool: {tool_name}")
-                result = self.get_demographics(params.get("arguments", {}))
-            else:
+            handler = self._dispatch.get(method) if isinstance(method, str) else None
+            if handler is None:
                 raise McpError(ErrorCode.METHOD_NOT_FOUND, f"Unknown method: {method}")
+            result = handler(params)
             return {"id": request_id, "result": result}
         except McpError as e:
             return {"id": request_id, "error": {"code": e.code, "message": e.message}}
@@ -120,31 +234,108 @@ class UnhcrDemographicsServer:
         print("UNHCR Demographics MCP server starting...", file=sys.stderr)
         print("Running on stdio", file=sys.stderr)
         print("Waiting for input...", file=sys.stderr)
+        if FRAMED:
+            self._run_framed()
+            return
         import time
+        readline = sys.stdin.buffer.readline
+        out = sys.stdout.buffer
+        out_write = out.write
+
+        def send(message: Dict[str, Any]) -> int:
+            payload = _dumpb(message)
+            out_write(payload)
+            out_write(b"\n")
+            out.flush()
+            return len(payload)
+
         while self.running:
             try:
-                print("Checking for input...", file=sys.stderr)
+                if DEBUG:
+                    print("Checking for input...", file=sys.stderr)
                 if not sys.stdin.readable():
                     print("Stdin not readable!", file=sys.stderr)
-                line = sys.stdin.readline().strip()
+                line = readline().strip()
                 if not line:
-                    print("No input received, server alive", file=sys.stderr)
+                    if DEBUG:
+                        print("No input received, server alive", file=sys.stderr)
                     time.sleep(1)
                     continue
-                print(f"Received request: {line}", file=sys.stderr)
-                request = json.loads(line)
+                if DEBUG:
+                    print(f"Received request: {line.decode(errors='replace')}", file=sys.stderr)
+                request = _loads(line)
                 response = self.handle_request(request)
-                print(f"Sending response: {json.dumps(response)}", file=sys.stderr)
-                print(json.dumps(response), flush=True)
-                print("Response sent", file=sys.stderr)
+                sent = send(response)
+                if DEBUG:
+                    print(f"Sent response: {sent} bytes", file=sys.stderr)
             except json.JSONDecodeError:
                 error_response = {"id": 0, "error": {"code": ErrorCode.INVALID_ARGUMENTS, "message": "Invalid JSON"}}
-                print(f"Error: Invalid JSON - {line}", file=sys.stderr)
-                print(json.dumps(error_response), flush=True)
+                print(f"Error: Invalid JSON - {line.decode(errors='replace')}", file=sys.stderr)
+                send(error_response)
             except Exception as e:
                 error_response = {"id": 0, "error": {"code": ErrorCode.INTERNAL_ERROR, "message": str(e)}}
                 print(f"Error in run loop: {str(e)}", file=sys.stderr)
-                print(json.dumps(error_response), flush=True)
+                send(error_response)
+
+    def _run_framed(self):
+        # Drain whatever the client has pipelined with one read, answer every
+        # complete frame in it, and flush all replies with a single writev.
+        in_fd = sys.stdin.fileno()
+        out_fd = sys.stdout.fileno()
+        header_size = _FRAME_HEADER.size
+        unpack_from = _FRAME_HEADER.unpack_from
+        pack = _FRAME_HEADER.pack
+        inbuf = bytearray()
+
+        while self.running:
+            chunk = os.read(in_fd, _READ_SIZE)
+            if not chunk:
+                print("Input closed, stopping", file=sys.stderr)
+                break
+            inbuf += chunk
+
+            replies = []
+            offset = 0
+            oversized = False
+            while len(inbuf) - offset >= header_size:
+                (length,) = unpack_from(inbuf, offset)
+                if length > _MAX_FRAME:
+                    print(f"Error: frame length {length} exceeds {_MAX_FRAME} bytes, closing", file=sys.stderr)
+                    payload = _dumpb({"id": 0, "error": {
+                        "code": ErrorCode.INVALID_ARGUMENTS,
+                        "message": f"Frame too large: {length} bytes"
+                    }})
+                    replies.append(pack(len(payload)))
+                    replies.append(payload)
+                    oversized = True
+                    break
+                start = offset + header_size
+                end = start + length
+                if len(inbuf) < end:
+                    break
+                offset = end
+                if DEBUG:
+                    print(f"Received request: {length} bytes", file=sys.stderr)
+                try:
+                    response = self.handle_request(_loads(inbuf[start:end]))
+                except json.JSONDecodeError:
+                    print("Error: Invalid JSON frame", file=sys.stderr)
+                    response = {"id": 0, "error": {"code": ErrorCode.INVALID_ARGUMENTS, "message": "Invalid JSON"}}
+                except Exception as e:
+                    print(f"Error in run loop: {str(e)}", file=sys.stderr)
+                    response = {"id": 0, "error": {"code": ErrorCode.INTERNAL_ERROR, "message": str(e)}}
+                payload = _dumpb(response)
+                replies.append(pack(len(payload)))
+                replies.append(payload)
+            del inbuf[:offset]
+
+            if replies:
+                sent = len(replies) // 2
+                _writev_all(out_fd, replies)
+                if DEBUG:
+                    print(f"Sent {sent} response(s)", file=sys.stderr)
+            if oversized:
+                break
 
 if __name__ == "__main__":
     server = UnhcrDemographicsServer()